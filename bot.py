@@ -1,5 +1,7 @@
 import os
+import asyncio
 import logging
+import tempfile
 import time
 from threading import Thread
 from datetime import datetime, timedelta
@@ -19,11 +21,11 @@ from telegram.ext import (
 from dotenv import load_dotenv
 load_dotenv()
 
+from exporter import EXPORT_MAX_UPLOAD_SIZE, read_export, write_export
+from logging_setup import DEFAULT_DEDUP_WINDOW, setup_logging
+
 # Set up logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+log_listener = setup_logging(os.getenv('LOG_DEDUP_WINDOW', DEFAULT_DEDUP_WINDOW))
 logger = logging.getLogger(__name__)
 
 # MongoDB setup
@@ -61,7 +63,7 @@ async def delete_previous_warnings(chat_id: int, user_id: int, context: ContextT
                 message_id=msg_id
             )
         except Exception as e:
-            logger.warning(f"Could not delete message {msg_id}: {e}")
+            logger.warning("Could not delete message %s: %s", msg_id, e, extra={'chat_id': chat_id})
     
     if user_id in context.chat_data['user_warnings']:
         del context.chat_data['user_warnings'][user_id]
@@ -220,14 +222,14 @@ async def save_fsub_channel(chat_id: int, channel: str, update: Update, context:
                 f"✅ Success! All members must now join {f'@{channel}' if not channel.startswith('-') else 'the channel'} to participate here."
             )
         except Exception as perm_error:
-            logger.error(f"Permission check error: {perm_error}")
+            logger.error("Permission check error: %s", perm_error, extra={'chat_id': chat_id})
             await update.message.reply_text(
                 "⚠️ Warning: I can't check my permissions in that channel.\n"
                 "Make sure I'm added as admin to the channel."
             )
             
     except Exception as e:
-        logger.error(f"Error setting channel: {e}")
+        logger.error("Error setting channel: %s", e, extra={'chat_id': chat_id})
         await update.message.reply_text(
             "❌ Failed to set channel. Make sure:\n"
             "1. The channel exists\n"
@@ -291,7 +293,7 @@ async def check_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
         target_chat = channel_id if channel_id else (f"@{channel}" if channel and not channel.startswith('-') else channel)
         
         if not target_chat:
-            logger.warning(f"No valid channel identifier found for chat {chat.id}")
+            logger.warning("No valid channel identifier found for chat %s", chat.id, extra={'chat_id': chat.id})
             return
         
         try:
@@ -307,7 +309,7 @@ async def check_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     context.chat_data['last_channel_warning'] = current_time
                 return
         except Exception as perm_error:
-            logger.error(f"Permission check error: {perm_error}")
+            logger.error("Permission check error: %s", perm_error, extra={'chat_id': chat.id})
             return
         
         chat_member = await context.bot.get_chat_member(target_chat, user.id)
@@ -360,7 +362,7 @@ async def check_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             )
                             invite_link = invite_link_obj.invite_link
                 except Exception as e:
-                    logger.warning(f"Could not get/create invite link for channel: {e}")
+                    logger.warning("Could not get/create invite link for channel: %s", e, extra={'chat_id': chat.id})
                 
                 if channel and not channel.startswith('-'):
                     keyboard.append([
@@ -406,7 +408,7 @@ async def check_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 context.chat_data['user_warnings'][user.id].append(warning_msg.message_id)
                 
             except Exception as mute_error:
-                logger.error(f"Error muting user: {mute_error}")
+                logger.error("Error muting user: %s", mute_error, extra={'chat_id': chat.id})
                 last_mute_error = context.chat_data.get('last_mute_error', 0)
                 current_time = time.time()
                 if current_time - last_mute_error > 3600:
@@ -416,7 +418,7 @@ async def check_membership(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     context.chat_data['last_mute_error'] = current_time
     
     except Exception as e:
-        logger.error(f"Error in membership check: {e}")
+        logger.error("Error in membership check: %s", e, extra={'chat_id': chat.id})
 
 async def unmute_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -458,7 +460,7 @@ async def unmute_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 return
         except Exception as e:
-            logger.error(f"Error verifying membership: {e}")
+            logger.error("Error verifying membership: %s", e, extra={'chat_id': chat_id})
             await query.answer(
                 "⚠️ Error verifying membership. Please try again later.",
                 show_alert=True
@@ -495,7 +497,7 @@ async def unmute_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode='HTML'
         )
     except Exception as e:
-        logger.error(f"Error unmuting user: {e}")
+        logger.error("Error unmuting user: %s", e, extra={'chat_id': chat_id})
         await query.answer(
             "⚠️ Failed to unmute. Please contact an admin.",
             show_alert=True
@@ -630,11 +632,11 @@ async def broadcast_pin_callback(update: Update, context: ContextTypes.DEFAULT_T
                         message_id=sent_msg.message_id
                     )
                 except Exception as pin_error:
-                    logger.error(f"Pin failed in {recipient_id}: {pin_error}")
+                    logger.error("Pin failed in %s: %s", recipient_id, pin_error)
             
             successful += 1
         except Exception as e:
-            logger.error(f"Broadcast failed to {recipient_type} {recipient_id}: {e}")
+            logger.error("Broadcast failed to %s %s: %s", recipient_type, recipient_id, e)
             failed += 1
             failed_ids.append(recipient_id)
         
@@ -647,7 +649,7 @@ async def broadcast_pin_callback(update: Update, context: ContextTypes.DEFAULT_T
                     f"• Progress: {idx+1}/{total} ({((idx+1)/total)*100:.1f}%)"
                 )
             except Exception as e:
-                logger.error(f"Progress update failed: {e}")
+                logger.error("Progress update failed: %s", e)
     
     report_text = (
         f"✅ Broadcast completed!\n\n"
@@ -666,6 +668,50 @@ async def broadcast_pin_callback(update: Update, context: ContextTypes.DEFAULT_T
         text=report_text
     )
 
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if str(update.effective_user.id) != os.getenv('OWNER_ID'):
+        await update.message.reply_text("❌ You are not authorized to use this command.")
+        return
+
+    export_format = context.args[0].lower() if context.args else 'csv'
+    if export_format not in ['csv', 'jsonl']:
+        await update.message.reply_text("Usage:\n/export [csv|jsonl]")
+        return
+
+    progress_msg = await update.message.reply_text("📦 Preparing export...")
+
+    fd, path = tempfile.mkstemp(suffix=f".{export_format}.gz")
+    os.close(fd)
+    try:
+        counts = await asyncio.to_thread(write_export, db, export_format, path)
+        file_size = os.path.getsize(path)
+        if file_size > EXPORT_MAX_UPLOAD_SIZE:
+            await progress_msg.edit_text(
+                f"❌ Export is {file_size / (1024 * 1024):.1f} MB, which exceeds Telegram's "
+                f"{EXPORT_MAX_UPLOAD_SIZE // (1024 * 1024)} MB upload limit for bots."
+            )
+            return
+
+        # The upload sends the file in one piece, so read it off the event loop
+        export_data = await asyncio.to_thread(read_export, path)
+        filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}.gz"
+        await context.bot.send_document(
+            chat_id=update.effective_chat.id,
+            document=export_data,
+            filename=filename,
+            caption=(
+                f"✅ Export completed!\n\n"
+                f"• Users: {counts['users']}\n"
+                f"• Groups: {counts['fsub_channels']}"
+            )
+        )
+        await progress_msg.delete()
+    except Exception as e:
+        logger.error("Export failed: %s", e)
+        await progress_msg.edit_text("❌ Export failed. Check the logs for details.")
+    finally:
+        os.remove(path)
+
 def main():
     Thread(target=run_flask, daemon=True).start()
     
@@ -677,6 +723,7 @@ def main():
     application.add_handler(CommandHandler("disconnect", disconnect_fsub))
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("broadcast", broadcast_command))
+    application.add_handler(CommandHandler("export", export_command))
     application.add_handler(
         MessageHandler(filters.ChatType.GROUPS & ~filters.StatusUpdate.ALL, check_membership)
     )
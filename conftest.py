@@ -0,0 +1 @@
+# Presence of this file puts the repository root on sys.path for the tests
@@ -0,0 +1,45 @@
+import csv
+import gzip
+import json
+
+# Export settings: documents are pulled from MongoDB in batches of this size
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = {
+    'users': ['user_id', 'first_name', 'last_name', 'username', 'last_interaction'],
+    'fsub_channels': ['chat_id', 'channel', 'channel_id'],
+}
+EXPORT_COLUMNS = ['collection'] + [field for fields in EXPORT_FIELDS.values() for field in fields]
+# Bot API limit for documents uploaded by bots
+EXPORT_MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+def write_export(collections, export_format: str, path: str) -> dict:
+    """Stream users and fsub_channels into a gzip file, one batch at a time
+
+    `collections` maps a collection name to an object with a pymongo-style
+    find(); a pymongo Database works as-is.
+    """
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8', newline='') as export_file:
+        writer = None
+        if export_format == 'csv':
+            writer = csv.DictWriter(export_file, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+
+        for name, fields in EXPORT_FIELDS.items():
+            counts[name] = 0
+            projection = {field: 1 for field in fields}
+            projection['_id'] = 0
+            cursor = collections[name].find({}, projection, batch_size=EXPORT_BATCH_SIZE)
+            for doc in cursor:
+                row = {'collection': name}
+                row.update({field: doc.get(field) for field in fields})
+                if writer:
+                    writer.writerow(row)
+                else:
+                    export_file.write(json.dumps(row, default=str) + '\n')
+                counts[name] += 1
+    return counts
+
+def read_export(path: str) -> bytes:
+    with open(path, 'rb') as export_file:
+        return export_file.read()
@@ -0,0 +1,131 @@
+import atexit
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from threading import Event, Lock, Thread
+
+DEFAULT_DEDUP_WINDOW = 60.0
+MIN_DEDUP_WINDOW = 1.0
+
+class DuplicateSuppressingQueueHandler(QueueHandler):
+    """QueueHandler that collapses repeated errors per chat before enqueueing.
+
+    Records tagged with a chat_id are keyed on the chat, level, message
+    template and any exception arguments, so IDs that vary between calls are
+    ignored while different failures are kept apart. The first occurrence is
+    enqueued as-is; repeats inside the window are only counted, without being
+    formatted or queued, and reported as a single summary line once the
+    window elapses.
+    """
+
+    def __init__(self, log_queue, window: float = DEFAULT_DEDUP_WINDOW):
+        super().__init__(log_queue)
+        self.window = window
+        self.suppressed = {}
+        self.window_start = {}
+        self.summary_lock = Lock()
+
+    def emit(self, record: logging.LogRecord):
+        chat_id = getattr(record, 'chat_id', None)
+        if chat_id is None:
+            super().emit(record)
+            return
+
+        key = self.dedup_key(chat_id, record)
+        now = time.monotonic()
+        with self.summary_lock:
+            started = self.window_start.get(key)
+            if started is not None and now - started < self.window:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return
+            self.window_start[key] = now
+            # Close out the previous window before starting a new one
+            count = self.suppressed.pop(key, 0)
+
+        if count:
+            super().emit(self.summary_record(key, count))
+        super().emit(record)
+
+    @staticmethod
+    def dedup_key(chat_id, record: logging.LogRecord) -> tuple:
+        args = record.args if isinstance(record.args, tuple) else ()
+        errors = tuple(
+            f"{type(arg).__name__}: {arg}"
+            for arg in args if isinstance(arg, BaseException)
+        )
+        return (chat_id, record.levelno, record.msg, errors)
+
+    def flush_summaries(self, force: bool = False):
+        """Enqueue summary counts for every elapsed window, or all of them if forced."""
+        now = time.monotonic()
+        with self.summary_lock:
+            expired = [
+                key for key, started in self.window_start.items()
+                if force or now - started >= self.window
+            ]
+            summaries = []
+            for key in expired:
+                del self.window_start[key]
+                count = self.suppressed.pop(key, 0)
+                if count:
+                    summaries.append((key, count))
+
+        for key, count in summaries:
+            super().emit(self.summary_record(key, count))
+
+    def summary_record(self, key: tuple, count: int) -> logging.LogRecord:
+        chat_id, levelno, template, errors = key
+        detail = f" [{'; '.join(errors)}]" if errors else ""
+        return logging.makeLogRecord({
+            'name': __name__,
+            'levelno': levelno,
+            'levelname': logging.getLevelName(levelno),
+            'msg': "Suppressed %d repeats of %r%s in chat %s over the last %gs",
+            'args': (count, template, detail, chat_id, self.window),
+        })
+
+def parse_dedup_window(value) -> float:
+    """Parse LOG_DEDUP_WINDOW, falling back to the default on bad input."""
+    try:
+        window = float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_DEDUP_WINDOW
+    if window != window:  # NaN
+        return DEFAULT_DEDUP_WINDOW
+    return max(window, MIN_DEDUP_WINDOW)
+
+def run_log_summaries(handler: DuplicateSuppressingQueueHandler, stop: Event):
+    while not stop.wait(handler.window):
+        handler.flush_summaries()
+
+def shutdown_logging(handler: DuplicateSuppressingQueueHandler, listener: QueueListener, stop: Event):
+    """Report pending summaries, then drain the queue and stop the listener."""
+    stop.set()
+    handler.flush_summaries(force=True)
+    listener.stop()
+    for target in listener.handlers:
+        target.flush()
+
+def setup_logging(window=DEFAULT_DEDUP_WINDOW) -> QueueListener:
+    """Route all logging through a queue drained by a background thread."""
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+
+    log_queue = queue.SimpleQueue()
+    dedup_handler = DuplicateSuppressingQueueHandler(
+        log_queue,
+        window=parse_dedup_window(window)
+    )
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers = [dedup_handler]
+
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    stop = Event()
+    Thread(target=run_log_summaries, args=(dedup_handler, stop), daemon=True).start()
+    atexit.register(shutdown_logging, dedup_handler, listener, stop)
+    return listener
@@ -0,0 +1,91 @@
+import csv
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from exporter import EXPORT_BATCH_SIZE, EXPORT_COLUMNS, read_export, write_export
+
+class FakeCollection:
+    """Mimics pymongo's find(): applies the projection and yields lazily"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.find_calls = []
+
+    def find(self, query, projection, batch_size=None):
+        self.find_calls.append((query, projection, batch_size))
+        for doc in self.docs:
+            yield {key: value for key, value in doc.items() if projection.get(key)}
+
+@pytest.fixture
+def collections():
+    return {
+        'users': FakeCollection([
+            {'_id': 'a', 'user_id': 1, 'first_name': 'Ann', 'last_name': 'Lee',
+             'username': 'ann', 'last_interaction': datetime(2024, 5, 1, 12, 30)},
+            {'_id': 'b', 'user_id': 2, 'first_name': 'Bob'},
+        ]),
+        'fsub_channels': FakeCollection([
+            {'_id': 'c', 'chat_id': -100, 'channel': 'news', 'channel_id': -200},
+        ]),
+    }
+
+def test_csv_export(collections, tmp_path):
+    path = tmp_path / 'export.csv.gz'
+    counts = write_export(collections, 'csv', str(path))
+
+    assert counts == {'users': 2, 'fsub_channels': 1}
+    with gzip.open(path, 'rt', encoding='utf-8', newline='') as export_file:
+        rows = list(csv.reader(export_file))
+    assert rows[0] == EXPORT_COLUMNS == [
+        'collection', 'user_id', 'first_name', 'last_name', 'username',
+        'last_interaction', 'chat_id', 'channel', 'channel_id',
+    ]
+    assert rows[1:] == [
+        ['users', '1', 'Ann', 'Lee', 'ann', '2024-05-01 12:30:00', '', '', ''],
+        ['users', '2', 'Bob', '', '', '', '', '', ''],
+        ['fsub_channels', '', '', '', '', '', '-100', 'news', '-200'],
+    ]
+
+def test_jsonl_export(collections, tmp_path):
+    path = tmp_path / 'export.jsonl.gz'
+    counts = write_export(collections, 'jsonl', str(path))
+
+    assert counts == {'users': 2, 'fsub_channels': 1}
+    with gzip.open(path, 'rt', encoding='utf-8') as export_file:
+        rows = [json.loads(line) for line in export_file]
+    assert rows == [
+        {'collection': 'users', 'user_id': 1, 'first_name': 'Ann', 'last_name': 'Lee',
+         'username': 'ann', 'last_interaction': '2024-05-01 12:30:00'},
+        {'collection': 'users', 'user_id': 2, 'first_name': 'Bob', 'last_name': None,
+         'username': None, 'last_interaction': None},
+        {'collection': 'fsub_channels', 'chat_id': -100, 'channel': 'news', 'channel_id': -200},
+    ]
+
+def test_export_uses_projection_and_batched_cursor(collections, tmp_path):
+    write_export(collections, 'jsonl', str(tmp_path / 'export.jsonl.gz'))
+
+    assert collections['users'].find_calls == [(
+        {},
+        {'user_id': 1, 'first_name': 1, 'last_name': 1, 'username': 1,
+         'last_interaction': 1, '_id': 0},
+        EXPORT_BATCH_SIZE,
+    )]
+    assert collections['fsub_channels'].find_calls == [(
+        {},
+        {'chat_id': 1, 'channel': 1, 'channel_id': 1, '_id': 0},
+        EXPORT_BATCH_SIZE,
+    )]
+
+def test_empty_export(tmp_path):
+    path = tmp_path / 'export.csv.gz'
+    counts = write_export(
+        {'users': FakeCollection([]), 'fsub_channels': FakeCollection([])},
+        'csv',
+        str(path)
+    )
+
+    assert counts == {'users': 0, 'fsub_channels': 0}
+    assert gzip.decompress(read_export(str(path))).decode() == ','.join(EXPORT_COLUMNS) + '\r\n'
@@ -0,0 +1,175 @@
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+
+import logging_setup
+from logging_setup import (
+    DEFAULT_DEDUP_WINDOW,
+    MIN_DEDUP_WINDOW,
+    DuplicateSuppressingQueueHandler,
+    parse_dedup_window,
+)
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class CountingArg:
+    """Argument that records how often it is rendered"""
+
+    def __init__(self, value):
+        self.value = value
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return str(self.value)
+
+def make_logger(name, window):
+    target = CollectingHandler()
+    log_queue = queue.SimpleQueue()
+    dedup = DuplicateSuppressingQueueHandler(log_queue, window=window)
+    listener = QueueListener(log_queue, target)
+    logger = logging.getLogger(name)
+    logger.handlers = [dedup]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger, listener, dedup, target, log_queue
+
+def test_repeats_with_different_ids_collapse():
+    logger, listener, dedup, target, _ = make_logger('test_collapse', window=60)
+    listener.start()
+    for msg_id in range(5):
+        logger.warning("Could not delete message %s: %s", msg_id, "gone", extra={'chat_id': 1})
+    dedup.flush_summaries(force=True)
+    listener.stop()
+
+    assert target.messages == [
+        "Could not delete message 0: gone",
+        "Suppressed 4 repeats of 'Could not delete message %s: %s' in chat 1 over the last 60s",
+    ]
+
+def test_different_exceptions_under_same_template_are_kept():
+    logger, listener, dedup, target, _ = make_logger('test_exceptions', window=60)
+    listener.start()
+    logger.error("Error in membership check: %s", ValueError("Chat not found"), extra={'chat_id': 1})
+    logger.error("Error in membership check: %s", PermissionError("Forbidden: bot was kicked"), extra={'chat_id': 1})
+    logger.error("Error in membership check: %s", ValueError("Chat not found"), extra={'chat_id': 1})
+    dedup.flush_summaries(force=True)
+    listener.stop()
+
+    assert target.messages == [
+        "Error in membership check: Chat not found",
+        "Error in membership check: Forbidden: bot was kicked",
+        "Suppressed 1 repeats of 'Error in membership check: %s' "
+        "[ValueError: Chat not found] in chat 1 over the last 60s",
+    ]
+
+def test_suppressed_records_are_not_formatted_or_queued():
+    logger, _, dedup, _, log_queue = make_logger('test_lazy', window=60)
+    arg = CountingArg(42)
+    for _ in range(5):
+        logger.warning("Could not delete message %s", arg, extra={'chat_id': 1})
+
+    assert arg.renders == 1
+    assert log_queue.qsize() == 1
+
+def test_chats_are_deduplicated_separately():
+    logger, listener, dedup, target, _ = make_logger('test_chats', window=60)
+    listener.start()
+    logger.error("Error in membership check: %s", "boom", extra={'chat_id': 1})
+    logger.error("Error in membership check: %s", "boom", extra={'chat_id': 2})
+    logger.error("Error in membership check: %s", "boom", extra={'chat_id': 1})
+    logger.error("No chat attached")
+    logger.error("No chat attached")
+    dedup.flush_summaries(force=True)
+    listener.stop()
+
+    assert target.messages == [
+        "Error in membership check: boom",
+        "Error in membership check: boom",
+        "No chat attached",
+        "No chat attached",
+        "Suppressed 1 repeats of 'Error in membership check: %s' in chat 1 over the last 60s",
+    ]
+
+def test_expired_window_reports_pending_count_before_new_record():
+    logger, listener, dedup, target, _ = make_logger('test_expired', window=0.05)
+    listener.start()
+    for _ in range(3):
+        logger.error("Permission check error: %s", "x", extra={'chat_id': 7})
+    time.sleep(0.1)
+    logger.error("Permission check error: %s", "x", extra={'chat_id': 7})
+    dedup.flush_summaries(force=True)
+    listener.stop()
+
+    assert target.messages == [
+        "Permission check error: x",
+        "Suppressed 2 repeats of 'Permission check error: %s' in chat 7 over the last 0.05s",
+        "Permission check error: x",
+    ]
+
+def test_parse_dedup_window():
+    assert parse_dedup_window('30') == 30
+    assert parse_dedup_window('0') == MIN_DEDUP_WINDOW
+    assert parse_dedup_window('-5') == MIN_DEDUP_WINDOW
+    assert parse_dedup_window('abc') == DEFAULT_DEDUP_WINDOW
+    assert parse_dedup_window('nan') == DEFAULT_DEDUP_WINDOW
+    assert parse_dedup_window(None) == DEFAULT_DEDUP_WINDOW
+
+def test_setup_logging_flushes_pending_summary_on_shutdown(monkeypatch, capsys):
+    exit_hooks = []
+    monkeypatch.setattr(logging_setup.atexit, 'register', lambda *args: exit_hooks.append(args))
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        logging_setup.setup_logging('60')
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0], DuplicateSuppressingQueueHandler)
+
+        logger = logging.getLogger('test_setup')
+        for msg_id in range(3):
+            logger.warning("Could not delete message %s", msg_id, extra={'chat_id': 5})
+
+        assert len(exit_hooks) == 1
+        hook, *args = exit_hooks[0]
+        hook(*args)
+    finally:
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("WARNING - Could not delete message 0")
+    assert lines[1].endswith(
+        "WARNING - Suppressed 2 repeats of 'Could not delete message %s' in chat 5 over the last 60s"
+    )
+
+def test_setup_logging_summary_thread_flushes_elapsed_windows(monkeypatch, capsys):
+    exit_hooks = []
+    monkeypatch.setattr(logging_setup.atexit, 'register', lambda *args: exit_hooks.append(args))
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        logging_setup.setup_logging(MIN_DEDUP_WINDOW)
+        logger = logging.getLogger('test_thread')
+        for msg_id in range(3):
+            logger.warning("Could not delete message %s", msg_id, extra={'chat_id': 9})
+        time.sleep(MIN_DEDUP_WINDOW * 2.5)
+
+        hook, *args = exit_hooks[0]
+        hook(*args)
+    finally:
+        root.handlers = saved_handlers
+        root.setLevel(saved_level)
+
+    lines = capsys.readouterr().err.splitlines()
+    assert len(lines) == 2
+    assert lines[1].endswith(
+        "WARNING - Suppressed 2 repeats of 'Could not delete message %s' in chat 9 over the last 1s"
+    )